@@ -1,16 +1,21 @@
+import itertools
+
 from student import Student
 
 class Course:
     """Represents a course that students can enroll in"""
 
-    _id_counter = 1
+    __slots__ = ("course_id", "name", "enrolled_students", "_name_lower")
+
+    _ids = itertools.count(1)
 
     def __init__(self, name):
         """Create a new course with a unique ID and name"""
-        self.course_id = Course._id_counter
-        Course._id_counter += 1
+        self.course_id = next(Course._ids)
         self.name = name
-        self.enrolled_students = []
+        self.enrolled_students = set()
+        # key used by SystemManager's search index, fixed at creation so a later rename cannot orphan it
+        self._name_lower = name.lower()
 
     def __str__(self):
         """Return course information as a string"""
@@ -20,18 +25,26 @@ class Course:
         """Return course representation for debugging"""
         return f"course ID : {self.course_id}, Name : {self.name}, Enrolled: {len(self.enrolled_students)}"
 
+    def __eq__(self, other):
+        """Compare courses by their unique ID"""
+        if not isinstance(other, Course):
+            return NotImplemented
+        return self.course_id == other.course_id
+
+    def __hash__(self):
+        """Hash a course by its unique ID so it can be stored in sets"""
+        return hash(self.course_id)
+
     def enroll_student(self, student):
-        """Add a student to the course if not already enrolled"""
-        if student not in self.enrolled_students:
-            self.enrolled_students.append(student)
-            print(f"student enrolled successfully in {self.name}")
-        else:
-            print(f"student is already enrolled in {self.name}")
+        """Add a student to the course if not already enrolled and return whether it was added"""
+        if student in self.enrolled_students:
+            return False
+        self.enrolled_students.add(student)
+        return True
 
     def remove_student(self, student):
-        """Remove a student from the course if enrolled"""
-        if student in self.enrolled_students:
-            self.enrolled_students.remove(student)
-            print(f"student removed from {self.name}")
-        else:
-            print(f"student is not enrolled in {self.name}")
+        """Remove a student from the course if enrolled and return whether it was removed"""
+        if student not in self.enrolled_students:
+            return False
+        self.enrolled_students.remove(student)
+        return True
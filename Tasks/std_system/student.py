@@ -1,36 +1,78 @@
+import itertools
+import operator
+
+import numpy as np
+
+
 class Student:
     """Represents a student with courses and grades"""
 
-    _id_counter = 1
+    __slots__ = ("student_id", "name", "grades", "enrolled_courses")
+
+    _ids = itertools.count(1)
+    _grade_cap = 64
 
     def __init__(self, name):
         """Create a new student with a unique ID and name"""
         if not name:
             raise ValueError("Name cannot be empty")
 
-        self.student_id = Student._id_counter
-        Student._id_counter += 1
+        self.student_id = next(Student._ids)
         self.name = name
-        self.grades = {}
-        self.enrolled_courses = []
+        self.grades = np.full(Student._grade_cap, np.nan, dtype=np.float64)
+        self.enrolled_courses = set()
 
     def __str__(self):
         """Return student information as a readable string"""
-        return f"Student ID : {self.student_id}, Name : {self.name}, Grades: {self.grades}"
+        return f"Student ID : {self.student_id}, Name : {self.name}, Grades: {self.get_grades()}"
 
     def __repr__(self):
         """Return student representation for debugging"""
-        return f"Student ID : {self.student_id}, Name : {self.name}, Grades: {self.grades}"
+        return f"Student ID : {self.student_id}, Name : {self.name}, Grades: {self.get_grades()}"
+
+    def __eq__(self, other):
+        """Compare students by their unique ID"""
+        if not isinstance(other, Student):
+            return NotImplemented
+        return self.student_id == other.student_id
+
+    def __hash__(self):
+        """Hash a student by their unique ID so they can be stored in sets"""
+        return hash(self.student_id)
 
     def add_grade(self, course_id, grade):
         """Add or update the grade for a specific course"""
         if not 0 <= grade <= 100:
             raise ValueError("grades must be between 0 and 100")
+        if isinstance(course_id, bool):
+            raise TypeError("course ID must be an integer, not bool")
+        try:
+            course_id = operator.index(course_id)
+        except TypeError:
+            raise TypeError(f"course ID must be an integer, got {type(course_id).__name__}") from None
+        if course_id < 0:
+            raise ValueError("course ID cannot be negative")
+        if course_id >= len(self.grades):
+            grades = np.full(max(course_id + 1, 2 * len(self.grades)), np.nan, dtype=np.float64)
+            grades[:len(self.grades)] = self.grades
+            self.grades = grades
         self.grades[course_id] = grade
 
+    def get_grades(self):
+        """Return the recorded grades as a dict of course ID to grade"""
+        recorded = np.flatnonzero(~np.isnan(self.grades))
+        return {int(course_id): float(self.grades[course_id]) for course_id in recorded}
+
+    def average_grade(self):
+        """Return the average of the recorded grades, or None if there are none"""
+        recorded = self.grades[~np.isnan(self.grades)]
+        if not recorded.size:
+            return None
+        return float(recorded.mean())
+
     def enroll_in_course(self, course):
-        """Enroll the student in a course if not already enrolled"""
+        """Enroll the student in a course if not already enrolled and return whether it was added"""
         if course in self.enrolled_courses:
-            print(f"{self.name} is already enrolled in {course}")
-        else:
-            self.enrolled_courses.append(course)
+            return False
+        self.enrolled_courses.add(course)
+        return True
@@ -8,6 +8,7 @@ class SystemManager:
         """Initialize the system with empty student and course records"""
         self.students = {}  
         self.courses = {}   
+        self._courses_by_lower_name = {}
 
     def add_student(self, name):
         """Add a new student and return its ID"""
@@ -32,6 +33,7 @@ class SystemManager:
         """Add a new course and return its ID"""
         course = Course(name)
         self.courses[course.course_id] = course
+        self._courses_by_lower_name.setdefault(course._name_lower, []).append(course)
         print("Course added successfully.")
         return course.course_id
 
@@ -41,6 +43,10 @@ class SystemManager:
             course = self.courses[course_id]
             if not course.enrolled_students:
                 del self.courses[course_id]
+                same_name = self._courses_by_lower_name[course._name_lower]
+                same_name.remove(course)
+                if not same_name:
+                    del self._courses_by_lower_name[course._name_lower]
                 print("Course removed successfully.")
             else:
                 print("Course has enrolled students. Cannot remove.")
@@ -52,9 +58,9 @@ class SystemManager:
         if student_id in self.students and course_id in self.courses:
             student = self.students[student_id]
             course = self.courses[course_id]
-            if course.name not in student.enrolled_courses:   
-                student.enroll_in_course(course.name)
-                course.enroll_student(student.name)
+            if course not in student.enrolled_courses:
+                student.enroll_in_course(course)
+                course.enroll_student(student)
                 print("Student enrolled in course successfully.")
             else:
                 print("Student is already enrolled in the course.")
@@ -63,18 +69,14 @@ class SystemManager:
 
     def search_courses(self, search_name):
         """Return a list of courses matching the search name (case-insensitive)"""
-        result = []
-        for course in self.courses.values():
-            if search_name.lower() == course.name.lower():
-                result.append(course.name)
-        return result
+        return [course.name for course in self._courses_by_lower_name.get(search_name.lower(), [])]
 
     def record_grade(self, student_id, course_id, grade):
         """Record a grade for a student in a specific course"""
         if student_id in self.students and course_id in self.courses:
             student = self.students[student_id]
             course = self.courses[course_id]
-            student.add_grade(course.name, grade)
+            student.add_grade(course.course_id, grade)
             print("Grade recorded successfully.")
         else:
             print("Invalid student or course ID.")
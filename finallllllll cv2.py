@@ -1,36 +1,120 @@
 import cv2
+import itertools
 import mediapipe as mp
-import math
+import numpy as np
+import os
+import threading
 import tkinter as tk
+from queue import Empty, Queue
 from tkinter import filedialog
 
-def calculate_angle(a, b, c):
-    ba = [a[0] - b[0], a[1] - b[1]]
-    bc = [c[0] - b[0], c[1] - b[1]]
-    
-    dot_product = ba[0] * bc[0] + ba[1] * bc[1]
-    mag_ba = math.sqrt(ba[0]**2 + ba[1]**2)
-    mag_bc = math.sqrt(bc[0]**2 + bc[1]**2)
-    
-    if mag_ba * mag_bc == 0:
-        return 0
-    
-    angle_rad = math.acos(dot_product / (mag_ba * mag_bc))
-    angle_deg = angle_rad * (180.0 / math.pi)
-    return angle_deg
+def calculate_angles(a, b, c):
+    # a, b, c are (N, 2) arrays of points, returns the N angles at b in degrees
+    ba = a - b
+    bc = c - b
+
+    norms = np.linalg.norm(ba, axis=1) * np.linalg.norm(bc, axis=1)
+    cos = np.einsum('ij,ij->i', ba, bc) / np.where(norms == 0, 1, norms)
+    angles = np.degrees(np.arccos(np.clip(cos, -1.0, 1.0)))
+    return np.where(norms == 0, 0.0, angles)
 
-mp_drawing = mp.solutions.drawing_utils
 mp_pose = mp.solutions.pose
 
+LHIP, LKNEE, LANKLE, RHIP, RKNEE, RANKLE = (
+    mp_pose.PoseLandmark[n].value
+    for n in ('LEFT_HIP', 'LEFT_KNEE', 'LEFT_ANKLE', 'RIGHT_HIP', 'RIGHT_KNEE', 'RIGHT_ANKLE'))
+ANKLES = np.array([LANKLE, RANKLE])
+KNEES = np.array([LKNEE, RKNEE])
+HIPS = np.array([LHIP, RHIP])
+NUM_LANDMARKS = len(mp_pose.PoseLandmark)
+LEG_LANDMARKS = (LHIP, LKNEE, LANKLE, RHIP, RKNEE, RANKLE)
+MIN_LEG_VISIBILITY = 0.5
+
+def legs_visible(landmarks):
+    return min(landmarks[i].visibility for i in LEG_LANDMARKS) >= MIN_LEG_VISIBILITY
+
+_TK_ROOT = None
+
 def choose_video():
-    root = tk.Tk()
-    root.withdraw() 
-    file_path = filedialog.askopenfilename(title="اختر ملف الفيديو", filetypes=[("Video files", "*.mp4;*.avi;*.mov")])
+    global _TK_ROOT
+    if _TK_ROOT is None:
+        _TK_ROOT = tk.Tk()
+        _TK_ROOT.withdraw()
+    file_path = filedialog.askopenfilename(parent=_TK_ROOT, title="اختر ملف الفيديو", filetypes=[("Video files", "*.mp4;*.avi;*.mov")])
     return file_path
 
-def draw_feedback(image, left_knee_correct, right_knee_correct):
-    height, width = image.shape[:2]
-    
+FRAME_WIDTH, FRAME_HEIGHT = 960, 540
+# the pose model resizes its input to 256x256 anyway, so pass a smaller frame that keeps the aspect ratio
+POSE_WIDTH, POSE_HEIGHT = 480, 270
+
+# tried in order: NVIDIA, Intel/AMD (VA-API), Raspberry Pi / Jetson (OpenMAX)
+HW_H264_DECODERS = ("nvh264dec", "vaapih264dec", "omxh264dec")
+
+def has_gstreamer():
+    for line in cv2.getBuildInformation().splitlines():
+        if line.strip().startswith("GStreamer:"):
+            return "YES" in line
+    return False
+
+def open_capture(video_path):
+    # qtdemux only understands mp4/mov containers, everything else goes straight to the default backend
+    if has_gstreamer() and os.path.splitext(video_path)[1].lower() in (".mp4", ".mov"):
+        for decoder in HW_H264_DECODERS:
+            pipeline = (f'filesrc location="{video_path}" ! qtdemux ! h264parse ! {decoder} ! '
+                        f'videoconvert ! videoscale ! '
+                        f'video/x-raw,format=BGR,width={FRAME_WIDTH},height={FRAME_HEIGHT} ! appsink sync=false')
+            cap = cv2.VideoCapture(pipeline, cv2.CAP_GSTREAMER)
+            if cap.isOpened():
+                return cap
+            cap.release()
+    return cv2.VideoCapture(video_path)
+
+class FileVideoStream:
+    def __init__(self, video_path, queue_size=128):
+        self.cap = open_capture(video_path)
+        self.queue = Queue(maxsize=queue_size)
+        self.stopped = False
+        self.thread = threading.Thread(target=self._reader, daemon=True)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def _reader(self):
+        # decoding, resizing and colour conversion run here so the main loop only does pose inference and drawing
+        try:
+            while not self.stopped:
+                ret, frame = self.cap.read()
+                if not ret:
+                    break
+
+                # the hardware pipeline already scales in its caps, only the software path needs a resize
+                if frame.shape[1] != FRAME_WIDTH or frame.shape[0] != FRAME_HEIGHT:
+                    frame = cv2.resize(frame, (FRAME_WIDTH, FRAME_HEIGHT))
+                # MediaPipe gets a small RGB copy, drawing and imshow keep using the full-size BGR frame
+                small = cv2.resize(frame, (POSE_WIDTH, POSE_HEIGHT), interpolation=cv2.INTER_AREA)
+                self.queue.put((frame, cv2.cvtColor(small, cv2.COLOR_BGR2RGB)))
+        finally:
+            # always tell the consumer we are done, even if decoding or preprocessing failed
+            self.queue.put(None)
+
+    def read(self):
+        return self.queue.get()
+
+    def stop(self):
+        self.stopped = True
+        # keep draining so a reader blocked on a full queue can exit
+        while self.thread.is_alive():
+            try:
+                self.queue.get(timeout=0.1)
+            except Empty:
+                pass
+        self.cap.release()
+
+def render_feedback(image, left_knee_correct, right_knee_correct):
     left_color = (0, 255, 0) if left_knee_correct else (0, 0, 255)
     left_text = "Left Knee: High" if left_knee_correct else "Left Knee: Low"
     
@@ -45,76 +129,116 @@ def draw_feedback(image, left_knee_correct, right_knee_correct):
     cv2.putText(image, right_text, (30, 95), 
                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
 
-def analyze_high_knees(video_path):
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
+# the feedback panel only has 4 possible looks, so render each once and blit it every frame
+FEEDBACK_ROI = (slice(20, 111), slice(20, 301))
+
+def _build_feedback_overlays():
+    overlays = {}
+    for state in itertools.product([False, True], repeat=2):
+        canvas = np.zeros((111, 301, 3), dtype=np.uint8)
+        render_feedback(canvas, *state)
+        patch = canvas[FEEDBACK_ROI].copy()
+        overlays[state] = (patch, patch.any(axis=2, keepdims=True))
+    return overlays
+
+FEEDBACK_OVERLAYS = _build_feedback_overlays()
+
+def draw_feedback(image, left_knee_correct, right_knee_correct):
+    patch, mask = FEEDBACK_OVERLAYS[(bool(left_knee_correct), bool(right_knee_correct))]
+    np.copyto(image[FEEDBACK_ROI], patch, where=mask)
+
+def analyze_high_knees(video_path, interactive=True, output_path=None):
+    # OpenCV only resizes and converts colours here, leave the cores to MediaPipe's own threads
+    cv2.setNumThreads(0)
+
+    fvs = FileVideoStream(video_path)
+    if not fvs.isOpened():
         print("خطأ في فتح ملف الفيديو.")
+        fvs.cap.release()
         return
 
-    with mp_pose.Pose(min_detection_confidence=0.8, min_tracking_confidence=0.8) as pose:
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-
-            frame = cv2.resize(frame, (960, 540))
-            image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            image.flags.writeable = False
-            results = pose.process(image)
-
-            image.flags.writeable = True
-            image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-
-            if results.pose_landmarks:
-                mp_drawing.draw_landmarks(image, results.pose_landmarks, mp_pose.POSE_CONNECTIONS)
-                landmarks = results.pose_landmarks.landmark
-
-                # نقاط الجسم المهمة لتحليل تمرين الهاينيز
-                left_hip = [landmarks[mp_pose.PoseLandmark.LEFT_HIP.value].x * image.shape[1],
-                            landmarks[mp_pose.PoseLandmark.LEFT_HIP.value].y * image.shape[0]]
-                left_knee = [landmarks[mp_pose.PoseLandmark.LEFT_KNEE.value].x * image.shape[1],
-                             landmarks[mp_pose.PoseLandmark.LEFT_KNEE.value].y * image.shape[0]]
-                left_ankle = [landmarks[mp_pose.PoseLandmark.LEFT_ANKLE.value].x * image.shape[1],
-                              landmarks[mp_pose.PoseLandmark.LEFT_ANKLE.value].y * image.shape[0]]
-                
-                right_hip = [landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value].x * image.shape[1],
-                             landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value].y * image.shape[0]]
-                right_knee = [landmarks[mp_pose.PoseLandmark.RIGHT_KNEE.value].x * image.shape[1],
-                              landmarks[mp_pose.PoseLandmark.RIGHT_KNEE.value].y * image.shape[0]]
-                right_ankle = [landmarks[mp_pose.PoseLandmark.RIGHT_ANKLE.value].x * image.shape[1],
-                               landmarks[mp_pose.PoseLandmark.RIGHT_ANKLE.value].y * image.shape[0]]
-
-                left_knee_angle = calculate_angle(left_ankle, left_knee, left_hip)
-                right_knee_angle = calculate_angle(right_ankle, right_knee, right_hip)
-
-                left_knee_correct = left_knee_angle < 90  
-                right_knee_correct = right_knee_angle < 90
+    # offline runs skip imshow/waitKey and only write the annotated frames
+    writer = None
+    if not interactive:
+        if output_path is None:
+            output_path = os.path.splitext(video_path)[0] + "_analyzed.mp4"
+        # GStreamer appsink captures usually report 0 fps, so hardware-decoded runs are written at 30 fps
+        fps = fvs.cap.get(cv2.CAP_PROP_FPS) or 30
+        writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*"mp4v"), fps,
+                                 (FRAME_WIDTH, FRAME_HEIGHT))
+        if not writer.isOpened():
+            print(f"تعذر كتابة ملف الفيديو الناتج: {output_path}")
+            fvs.cap.release()
+            return
+
+    pts = np.empty((NUM_LANDMARKS, 2), dtype=np.float32)
+
+    fvs.start()
+    try:
+        with mp_pose.Pose(model_complexity=0,
+                          static_image_mode=False,
+                          smooth_landmarks=False,
+                          enable_segmentation=False,
+                          min_detection_confidence=0.6,
+                          min_tracking_confidence=0.6) as pose:
+            while True:
+                frames = fvs.read()
+                if frames is None:
+                    break
+
+                image, rgb = frames
+                rgb.flags.writeable = False
+                results = pose.process(rgb)
+
+                # low-confidence legs give unreliable angles, show the frame and wait for the tracker to recover
+                if results.pose_landmarks and not legs_visible(results.pose_landmarks.landmark):
+                    cv2.putText(image, "Tracking...", (50, 200), cv2.FONT_HERSHEY_SIMPLEX, 0.6,
+                                (0, 255, 255), 1)
+                elif results.pose_landmarks:
+                    landmarks = results.pose_landmarks.landmark
+
+                    # نقاط الجسم المهمة لتحليل تمرين الهاينيز
+                    for i, lm in enumerate(landmarks):
+                        pts[i, 0] = lm.x
+                        pts[i, 1] = lm.y
+                    pts *= (image.shape[1], image.shape[0])
+                    ankle_pts, knee_pts, hip_pts = pts[ANKLES], pts[KNEES], pts[HIPS]
+
+                    left_knee_angle, right_knee_angle = calculate_angles(ankle_pts, knee_pts, hip_pts)
+
+                    left_knee_correct = left_knee_angle < 90  
+                    right_knee_correct = right_knee_angle < 90
 
                
-                cv2.putText(image, f'L Knee Angle: {left_knee_angle:.1f}°', 
-                            (50, 200), cv2.FONT_HERSHEY_SIMPLEX, 0.6, 
-                            (0, 255, 0) if left_knee_correct else (0, 0, 255), 1)
-                cv2.putText(image, f'R Knee Angle: {right_knee_angle:.1f}°', 
-                            (50, 220), cv2.FONT_HERSHEY_SIMPLEX, 0.6, 
-                            (0, 255, 0) if right_knee_correct else (0, 0, 255), 1)
-
-                cv2.line(image, (int(left_ankle[0]), int(left_ankle[1])), 
-                        (int(left_knee[0]), int(left_knee[1])), 
-                        (0, 255, 255), 2)
-                cv2.line(image, (int(right_ankle[0]), int(right_ankle[1])), 
-                        (int(right_knee[0]), int(right_knee[1])), 
-                        (0, 255, 255), 2)
+                    cv2.putText(image, f'L Knee Angle: {left_knee_angle:.1f}°', 
+                                (50, 200), cv2.FONT_HERSHEY_SIMPLEX, 0.6, 
+                                (0, 255, 0) if left_knee_correct else (0, 0, 255), 1)
+                    cv2.putText(image, f'R Knee Angle: {right_knee_angle:.1f}°', 
+                                (50, 220), cv2.FONT_HERSHEY_SIMPLEX, 0.6, 
+                                (0, 255, 0) if right_knee_correct else (0, 0, 255), 1)
+
+                    # only the hip-knee-ankle chain of each leg is drawn, in a single call
+                    legs = np.stack([hip_pts, knee_pts, ankle_pts], axis=1).astype(np.int32)
+                    cv2.polylines(image, list(legs), False, (0, 255, 255), 2)
 
                
-                draw_feedback(image, left_knee_correct, right_knee_correct)
+                    draw_feedback(image, left_knee_correct, right_knee_correct)
+
+                if not interactive:
+                    writer.write(image)
+                    continue
 
-            cv2.imshow("AI Trainer - High Knees Analysis", image)
+                cv2.imshow("AI Trainer - High Knees Analysis", image)
 
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
 
-    cap.release()
-    cv2.destroyAllWindows()
+    finally:
+        fvs.stop()
+        if writer is not None:
+            writer.release()
+        else:
+            cv2.destroyAllWindows()
 
 if __name__ == "__main__":
     video_file = choose_video()